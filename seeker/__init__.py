@@ -5,7 +5,7 @@ from .mapping import (
     DEFAULT_ANALYZER, Indexable, ModelIndex, RawMultiString, RawString, build_mapping, deep_field_factory,
     document_field, document_from_model)
 from .registry import app_documents, documents, model_documents, register
-from .utils import delete, index, search
+from .utils import bulk_index, delete, index, refresh_disabled, search
 from .views import Column, SeekerView
 
 
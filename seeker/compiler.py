@@ -11,7 +11,7 @@ def cursor_iter(cursor, fetch_size=1000):
             cursor.execute('FETCH %s FROM seeker_cursor' % fetch_size)
             rows = cursor.fetchall()
             if not rows:
-                raise StopIteration()
+                return
             yield rows
     finally:
         cursor.execute('ROLLBACK')
@@ -27,7 +27,8 @@ class CursorCompiler (SQLCompiler):
         cursor = self.connection.cursor()
         cursor.execute('BEGIN')
         cursor.execute('DECLARE seeker_cursor CURSOR FOR ' + sql, params)
-        return cursor_iter(cursor, fetch_size=getattr(settings, 'SEEKER_BATCH_SIZE', 1000))
+        fetch_size = getattr(self.query, 'fetch_size', None) or getattr(settings, 'SEEKER_BATCH_SIZE', 1000)
+        return cursor_iter(cursor, fetch_size=fetch_size)
 
 
 class CursorQuery (Query):
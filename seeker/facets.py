@@ -27,7 +27,7 @@ class Facet (object):
     def data(self, response):
         try:
             return response.aggregations[self.name].to_dict()
-        except:
+        except (AttributeError, KeyError):
             return {}
 
     def get_key(self, bucket):
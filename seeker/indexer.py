@@ -11,6 +11,12 @@ class ModelIndexer(object):
     Class that automatically indexes any new or deleted mapped model objects.
     """
 
+    refresh = False
+    """
+    Whether to refresh the index after each change, so it is immediately visible to searches. Refreshing after every
+    save or delete is expensive, so by default changes become visible after the index's next periodic refresh.
+    """
+
     def connect_signal_handlers(self):
         """
         Connects save and delete signal handler for mapped models. Also checks each ModelIndex for any additional signal handling that may be needed. 
@@ -33,21 +39,21 @@ class ModelIndexer(object):
 
     def handle_save(self, sender, instance, **kwargs):
         try:
-            index(instance)
-        except:
+            index(instance, refresh=self.refresh)
+        except Exception:
             logger.exception('Error indexing %s instance: %s', sender, instance)
 
     def handle_delete(self, sender, instance, **kwargs):
         try:
-            delete(instance)
-        except:
+            delete(instance, refresh=self.refresh)
+        except Exception:
             logger.exception('Error deleting %s instance: %s', sender, instance)
 
     def handle_m2m_changed(self, sender, instance, action, **kwargs):
         if action in ('post_add', 'post_remove', 'post_clear'):
             try:
-                index(instance)
-            except:
+                index(instance, refresh=self.refresh)
+            except Exception:
                 logger.exception('Error indexing many to many change %s instance: %s', sender, instance)
 
 
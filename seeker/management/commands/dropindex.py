@@ -23,13 +23,12 @@ class Command (BaseCommand):
         connection = options['using'] or 'default'
         es = connections.get_connection(connection)
         
-        print 'Attempting to drop index "%s" using "%s" connection...' % (index, connection)
-        if es.indices.exists(index=index):
-            es.indices.delete(index=index)
-            if es.indices.exists(index=index):
-                print '...The index was NOT dropped.'
-            else:
-                print '...The index was dropped.'
+        self.stdout.write('Attempting to drop index "%s" using "%s" connection...' % (index, connection))
+        result = es.indices.delete(index=index, ignore=404)
+        if result.get('status') == 404:
+            self.stdout.write('...The index could not be dropped because it does not exist.')
+        elif result.get('acknowledged'):
+            self.stdout.write('...The index was dropped.')
         else:
-            print '...The index could not be dropped because it does not exist.'
+            self.stdout.write('...The index was NOT dropped.')
             
@@ -1,9 +1,10 @@
 from django.apps import apps
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from elasticsearch.helpers import scan
 from elasticsearch_dsl.connections import connections
 
 from optparse import make_option
+import io
 import json
 
 
@@ -22,16 +23,70 @@ class Command (BaseCommand):
             default=None,
             help='Index to dump'
         ),
+        make_option('--bulk',
+            action='store_true',
+            dest='bulk',
+            default=False,
+            help='Write newline-delimited bulk API data, which loadindex can send to Elasticsearch without re-encoding'
+        ),
+        make_option('--zstd',
+            action='store_true',
+            dest='zstd',
+            default=False,
+            help='Compress the output using Zstandard (requires the zstandard package)'
+        ),
     )
 
+    # Hit metadata that is carried over into the action line of each document when using --bulk.
+    bulk_meta = ('_index', '_type', '_id', '_parent', '_routing')
+
     def handle(self, *args, **options):
+        if options['bulk'] and options['indent'] is not None:
+            raise CommandError('The --indent option cannot be used with --bulk.')
         doc_types = ','.join(args) or None
-        output = self.stdout
-        output.write('[')
-        es = connections.get_connection()
-        for idx, doc in enumerate(scan(es, index=options['index'], doc_type=doc_types)):
-            if idx > 0:
-                output.write(',')
-            output.write(json.dumps(doc, indent=options['indent']), ending='')
-        output.write(']')
-        output.flush()
+        # Write encoded bytes to the underlying binary stream in large chunks, instead of going through Django's
+        # OutputWrapper (and a text-mode stream) for every document.
+        binary = hasattr(self.stdout, 'buffer')
+        if options['zstd']:
+            if not binary:
+                raise CommandError('Compressed output can only be written to a binary stream.')
+            try:
+                import zstandard
+            except ImportError:
+                raise CommandError('The zstandard package is required to use --zstd.')
+        if binary:
+            self.stdout.flush()
+            buffered = io.BufferedWriter(self.stdout.buffer, buffer_size=1 << 20)
+        else:
+            buffered = io.BytesIO()
+        try:
+            output = buffered
+            if options['zstd']:
+                output = zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(buffered)
+            es = connections.get_connection()
+            hits = scan(es, index=options['index'], doc_type=doc_types)
+            if options['bulk']:
+                for doc in hits:
+                    action = {key: doc[key] for key in self.bulk_meta if key in doc}
+                    output.write(json.dumps({'index': action}).encode('utf-8'))
+                    output.write(b'\n')
+                    output.write(json.dumps(doc['_source']).encode('utf-8'))
+                    output.write(b'\n')
+            else:
+                output.write(b'[')
+                for idx, doc in enumerate(hits):
+                    if idx > 0:
+                        output.write(b',')
+                    output.write(json.dumps(doc, indent=options['indent']).encode('utf-8'))
+                output.write(b']')
+            if options['zstd']:
+                # End the Zstandard frame without closing the stream underneath it.
+                output.flush(zstandard.FLUSH_FRAME)
+            buffered.flush()
+        finally:
+            if binary:
+                # Don't let the BufferedWriter close the underlying stream when it is garbage collected.
+                buffered.detach()
+        if not binary:
+            self.stdout.write(buffered.getvalue().decode('utf-8'), ending='')
+            self.stdout.flush()
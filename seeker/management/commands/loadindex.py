@@ -1,4 +1,5 @@
 from django.apps import apps
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from elasticsearch.helpers import bulk
 from elasticsearch_dsl.connections import connections
@@ -6,6 +7,7 @@ from elasticsearch_dsl.connections import connections
 from seeker.registry import model_doc_types
 
 from optparse import make_option
+import io
 import json
 
 
@@ -24,21 +26,86 @@ class Command (BaseCommand):
         ),
     )
 
+    # The first four bytes of any Zstandard frame (written by ``dumpindex --zstd``).
+    zstd_magic = b'\x28\xb5\x2f\xfd'
+
     def handle(self, *args, **options):
         if not options['filename']:
             raise CommandError('Please specify a file (-f) to read data from')
 
         refresh_indices = set()
+        es = connections.get_connection()
+
+        with io.open(options['filename'], 'rb') as fp:
+            stream = self.decompress(fp)
+            if stream.peek(1)[:1] == b'[':
+                self.load_json(es, stream, options, refresh_indices)
+            else:
+                self.load_bulk(es, stream, options, refresh_indices)
+
+        if refresh_indices:
+            es.indices.refresh(index=','.join(refresh_indices))
 
+    def decompress(self, fp):
+        """
+        Returns a buffered binary stream of the file contents, decompressing them if they were written by
+        ``dumpindex --zstd``.
+        """
+        if fp.peek(4)[:4] != self.zstd_magic:
+            return fp
+        try:
+            import zstandard
+        except ImportError:
+            raise CommandError('The zstandard package is required to load compressed index data.')
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(fp))
+
+    def load_json(self, es, stream, options, refresh_indices):
+        """
+        Loads a JSON array of search hits, as written by ``dumpindex``.
+        """
         def get_actions():
-            for data in json.load(open(options['filename'], 'rb')):
+            for data in json.loads(stream.read().decode('utf-8')):
                 if options['index']:
                     data['_index'] = options['index']
                 refresh_indices.add(data['_index'])
                 yield data
 
-        es = connections.get_connection()
         bulk(es, get_actions())
 
-        for index in refresh_indices:
-            es.indices.refresh(index=index)
+    def load_bulk(self, es, stream, options, refresh_indices):
+        """
+        Loads newline-delimited bulk data, as written by ``dumpindex --bulk``. Document sources are sent to
+        Elasticsearch as-is, only the (small) action lines are decoded.
+        """
+        batch_size = getattr(settings, 'SEEKER_BATCH_SIZE', 1000)
+        errors = 0
+
+        def send(lines):
+            response = es.bulk(body=''.join(lines))
+            if response.get('errors'):
+                return sum(1 for item in response['items'] for op in item.values() if 'error' in op)
+            return 0
+
+        lines = []
+        for action_line in stream:
+            action_line = action_line.decode('utf-8')
+            if not action_line.strip():
+                continue
+            action = json.loads(action_line)
+            meta = next(iter(action.values()))
+            if options['index']:
+                meta['_index'] = options['index']
+                action_line = json.dumps(action) + '\n'
+            refresh_indices.add(meta['_index'])
+            lines.append(action_line)
+            try:
+                lines.append(next(stream).decode('utf-8'))
+            except StopIteration:
+                raise CommandError('Truncated bulk file')
+            if len(lines) >= 2 * batch_size:
+                errors += send(lines)
+                lines = []
+        if lines:
+            errors += send(lines)
+        if errors:
+            raise CommandError('%d document(s) failed to load.' % errors)
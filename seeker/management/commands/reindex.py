@@ -1,36 +1,113 @@
-import argparse
-
+from django import db
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from elasticsearch.helpers import bulk
+from django.core.management.base import BaseCommand, CommandError
 from elasticsearch_dsl.connections import connections
 
 from seeker.registry import app_documents, documents
-from seeker.utils import progress
+from seeker.mapping import ModelIndex
+from seeker.utils import approximate_count, disable_refresh, progress, restore_refresh
+
+from collections import OrderedDict
+import gc
+import logging
+import multiprocessing
+import sys
+
+
+logger = logging.getLogger(__name__)
+
+# The generation-0 garbage collection threshold used while loading data. Indexing allocates lots of short-lived objects
+# (model instances, document dicts, encoded chunks) that reference counting frees anyway, so the default threshold of
+# 700 would trigger frequent and mostly fruitless collections. All generations are still collected automatically.
+GC_THRESHOLD = 50000
+
+
+def primary_shards(es, index):
+    """
+    Returns the number of primary shards for the specified index.
+    """
+    for data in es.indices.get_settings(index=index).values():
+        return int(data['settings']['index']['number_of_shards'])
+    return 1
+
+
+def index_types(es, index):
+    """
+    Returns the set of document types mapped in the specified index, or ``None`` if it is missing (or is an alias).
+    """
+    result = es.indices.get_mapping(index=index, ignore=404)
+    if index not in result:
+        return None
+    return set(result[index].get('mappings', {}))
+
+
+def index_aliases(es, index):
+    """
+    Returns the set of aliases pointing at the specified index.
+    """
+    result = es.indices.get_alias(index=index, ignore=404)
+    return set(result.get(index, {}).get('aliases', {}))
 
 
 def reindex(doc_class, index, using, options):
     """
-    Index all the things, using ElasticSearch's bulk API for speed.
+    Index all the things, using ElasticSearch's bulk API for speed. The index is not refreshed, so callers should
+    refresh it once all of its document types have been indexed. Returns the number of documents that failed to index.
     """
-    def get_actions():
-        for doc in doc_class.documents(cursor=options['cursor']):
-            action = {
-                '_index': index,
-                '_type': doc_class._doc_type.name,
-            }
-            action.update(doc)
-            yield action
+    documents = doc_class.documents(cursor=options['cursor'], chunk_size=options['chunk_size'])
     es = connections.get_connection(using)
-    actions = get_actions() if options['quiet'] else progress(get_actions(), count=doc_class.count(), label=doc_class.__name__)
-    bulk(es, actions)
-    es.indices.refresh(index=index)
+    if not options['quiet']:
+        if not options['approx_count']:
+            count = doc_class.count()
+        elif issubclass(doc_class, ModelIndex):
+            count = approximate_count(doc_class.queryset().model)
+        else:
+            count = None
+        # Only check whether the progress bar needs updating once per bulk request's worth of documents.
+        documents = progress(documents, count=count, label=doc_class.__name__, miniters=options['bulk_size'])
+    thread_count = options['bulk_threads'] or primary_shards(es, index)
+    logger.info('Indexing %s with chunk_size=%s, max_chunk_bytes=%s, thread_count=%s', doc_class.__name__,
+                options['bulk_size'], options['max_chunk_bytes'], thread_count)
+    # Failed documents are logged and counted (instead of aborting the whole re-index on the first bad chunk).
+    succeeded, failed = doc_class.bulk_index(
+        index=index, using=using, documents=documents, thread_count=thread_count, chunk_size=options['bulk_size'],
+        max_chunk_bytes=options['max_chunk_bytes'])
+    if failed:
+        logger.error('%s documents failed to index for %s', failed, doc_class.__name__)
+    return failed
+
+
+def reindex_group(doc_classes, index, using, options):
+    """
+    Re-indexes a group of document classes (all sharing the same index) one after the other. Used as the unit of work
+    when re-indexing several indices concurrently. Returns a list of ``(class name, failed document count)`` pairs.
+    """
+    try:
+        return [(doc_class.__name__, reindex(doc_class, index, using, options)) for doc_class in doc_classes]
+    finally:
+        # Each worker thread gets its own database connection(s), so close them when the work is done.
+        db.connections.close_all()
+
+
+def reindex_group_process(doc_class_keys, index, using, options):
+    """
+    Re-indexes a group of document classes in a separate (spawned) process. Document classes are passed as
+    ``(module, name)`` pairs and looked up in the registry once Django has been set up in the new process.
+    """
+    import django
+    django.setup()
+    registered = {(doc_class.__module__, doc_class.__name__): doc_class for doc_class in documents}
+    # Worker processes only ever re-index, so the threshold doesn't need restoring.
+    gc.set_threshold(GC_THRESHOLD, *gc.get_threshold()[1:])
+    return reindex_group([registered[key] for key in doc_class_keys], index, using, options)
 
 
 class Command (BaseCommand):
-    args = '<app1 app2 ...>'
     help = 'Re-indexes the specified applications'
 
+    # The options used by reindex(), which are passed along to worker processes.
+    reindex_options = ('quiet', 'cursor', 'chunk_size', 'approx_count', 'bulk_size', 'max_chunk_bytes', 'bulk_threads')
+
     def add_arguments(self, parser):
         parser.add_argument('--using',
             dest='using',
@@ -59,6 +136,13 @@ class Command (BaseCommand):
             default=False,
             help='Deletes all documents before re-indexing'
         )
+        parser.add_argument('--recreate',
+            action='store_true',
+            dest='recreate',
+            default=False,
+            help='Like --clear, but drops and re-creates the index when it only holds this document type and has no '
+                 'aliases (resetting any index settings, such as the number of shards, to their defaults)'
+        )
         parser.add_argument('--no-data',
             action='store_false',
             dest='data',
@@ -70,24 +154,163 @@ class Command (BaseCommand):
             dest='cursor',
             default=False,
             help='Use a server-side cursor when fetching data for indexing')
-        parser.add_argument('args', nargs=argparse.REMAINDER)
+        parser.add_argument('--approx-count',
+            action='store_true',
+            dest='approx_count',
+            default=False,
+            help='Use database table statistics instead of counting documents for the progress bar'
+        )
+        parser.add_argument('--chunk-size',
+            type=int,
+            dest='chunk_size',
+            default=None,
+            help='The number of records to fetch from the database at a time (defaults to SEEKER_BATCH_SIZE)'
+        )
+        parser.add_argument('--bulk-size',
+            type=int,
+            dest='bulk_size',
+            default=getattr(settings, 'SEEKER_BATCH_SIZE', 1000),
+            help='The maximum number of documents to send in each bulk request'
+        )
+        parser.add_argument('--max-chunk-bytes',
+            type=int,
+            dest='max_chunk_bytes',
+            default=10 * 1024 * 1024,
+            help='The maximum size (in bytes) of each bulk request'
+        )
+        parser.add_argument('--bulk-threads',
+            type=int,
+            dest='bulk_threads',
+            default=1,
+            help='The number of threads sending bulk requests for each index (0 uses the number of primary shards)'
+        )
+        parser.add_argument('--forcemerge',
+            action='store_true',
+            dest='forcemerge',
+            default=False,
+            help='Force merge the re-indexed indices (down to 5 segments) once indexing is finished'
+        )
+        parser.add_argument('--workers',
+            type=int,
+            dest='workers',
+            default=getattr(settings, 'SEEKER_REINDEX_WORKERS', 1),
+            help='The number of indices to re-index concurrently'
+        )
+        parser.add_argument('--processes',
+            action='store_true',
+            dest='processes',
+            default=False,
+            help='Use separate processes (instead of threads) for --workers (requires Python 3.7 or later)'
+        )
+        parser.add_argument('app_labels',
+            nargs='*',
+            metavar='app_label',
+            help='The applications to re-index (defaults to all registered documents)'
+        )
 
     def handle(self, *args, **options):
+        if options['processes'] and sys.version_info < (3, 7):
+            # ProcessPoolExecutor only accepts an mp_context (to spawn, rather than fork, processes) on Python 3.7+.
+            raise CommandError('--processes requires Python 3.7 or later.')
         doc_classes = []
-        for label in args:
+        for label in options['app_labels']:
             doc_classes.extend(app_documents.get(label, []))
-        if not args:
+        if not options['app_labels']:
             doc_classes.extend(documents)
+        default_index = getattr(settings, 'SEEKER_INDEX', 'seeker')
         if options['drop']:
-            index = options['index'] or getattr(settings, 'SEEKER_INDEX', 'seeker')
+            index = options['index'] or default_index
             es = connections.get_connection(options['using'] or 'default')
-            if es.indices.exists(index=index):
-                es.indices.delete(index=index)
+            es.indices.delete(index=index, ignore=404)
+        # The number of bulk threads for each (index, using), resolved at most once per index.
+        bulk_threads = {}
+
+        def get_bulk_threads(es, index, using):
+            if (index, using) not in bulk_threads:
+                bulk_threads[(index, using)] = options['bulk_threads'] or primary_shards(es, index)
+            return bulk_threads[(index, using)]
+
+        # Group the document classes by index, so that different indices can be re-indexed concurrently.
+        groups = OrderedDict()
         for doc_class in doc_classes:
-            using = options['using'] or doc_class._doc_type.using or 'default'
-            index = options['index'] or doc_class._doc_type.index or getattr(settings, 'SEEKER_INDEX', 'seeker')
-            if options['clear'] and not options['drop']:
-                doc_class.clear(index=index, using=using)
+            doc_type = doc_class._doc_type
+            using = options['using'] or doc_type.using or 'default'
+            index = options['index'] or doc_type.index or default_index
+            if (options['clear'] or options['recreate']) and not options['drop']:
+                es = connections.get_connection(using)
+                types = index_types(es, index)
+                if options['recreate'] and types == {doc_type.name} and not index_aliases(es, index):
+                    # When this is the only document type in the index, dropping the index (and letting init re-create
+                    # it below) is much faster than deleting every document individually. Aliases would be lost.
+                    logger.info('Dropping index %s instead of clearing %s', index, doc_class.__name__)
+                    es.indices.delete(index=index, ignore=404)
+                elif types is not None or es.indices.exists(index=index):
+                    # There's nothing to clear if the index doesn't exist yet (types is also None for aliases). When
+                    # re-indexing data, the index is refreshed once at the end instead.
+                    doc_class.clear(index=index, using=using, refresh=not options['data'],
+                                    thread_count=get_bulk_threads(es, index, using))
             doc_class.init(index=index, using=using)
             if options['data']:
-                reindex(doc_class, index, using, options)
+                groups.setdefault((index, using), []).append(doc_class)
+        # Turn off refreshes and replicas while loading data, and make sure they're restored afterwards.
+        original_settings = OrderedDict()
+        group_options = {}
+        # Collect garbage less often while loading data (see GC_THRESHOLD).
+        gc_threshold = gc.get_threshold()
+        gc.set_threshold(GC_THRESHOLD, *gc_threshold[1:])
+        # The (class name, failed document count) pairs for every re-indexed document class.
+        results = []
+        try:
+            for index, using in groups:
+                es = connections.get_connection(using)
+                original_settings[(index, using)] = disable_refresh(es, index, replicas=True)
+                group_options[(index, using)] = dict(options, bulk_threads=get_bulk_threads(es, index, using))
+            workers = min(options['workers'], len(groups))
+            if workers > 1:
+                # Imported here, since concurrent.futures needs the futures backport on Python 2.
+                from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+                # Concurrent progress bars would overwrite each other.
+                for opts in group_options.values():
+                    opts['quiet'] = True
+                if options['processes']:
+                    # Spawned processes set Django (and Elasticsearch connections) up from scratch, rather than sharing
+                    # database and HTTP connections with this process.
+                    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    executor = ThreadPoolExecutor(max_workers=workers)
+                with executor:
+                    futures = []
+                    for (index, using), group in groups.items():
+                        opts = group_options[(index, using)]
+                        if options['processes']:
+                            keys = [(doc_class.__module__, doc_class.__name__) for doc_class in group]
+                            opts = {name: opts[name] for name in self.reindex_options}
+                            futures.append(executor.submit(reindex_group_process, keys, index, using, opts))
+                        else:
+                            futures.append(executor.submit(reindex_group, group, index, using, opts))
+                    for future in as_completed(futures):
+                        results.extend(future.result())
+            else:
+                for (index, using), group in groups.items():
+                    for doc_class in group:
+                        failed = reindex(doc_class, index, using, group_options[(index, using)])
+                        results.append((doc_class.__name__, failed))
+        finally:
+            gc.set_threshold(*gc_threshold)
+            for (index, using), original in original_settings.items():
+                restore_refresh(connections.get_connection(using), index, original)
+        # Refresh every index that was written to once, with a single request per connection.
+        refresh_indices = OrderedDict()
+        for index, using in groups:
+            refresh_indices.setdefault(using, []).append(index)
+        for using, indices in refresh_indices.items():
+            es = connections.get_connection(using)
+            es.indices.refresh(index=','.join(indices))
+            if options['forcemerge']:
+                es.indices.forcemerge(index=','.join(indices), max_num_segments=5)
+        failures = [(name, failed) for name, failed in results if failed]
+        for name, failed in failures:
+            self.stderr.write('%s: %s documents failed to index' % (name, failed))
+        if failures:
+            raise CommandError('%s documents failed to index (see the log for details).' %
+                               sum(failed for name, failed in failures))
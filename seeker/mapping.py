@@ -1,12 +1,17 @@
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
-from elasticsearch.helpers import bulk, scan
+from elasticsearch.helpers import bulk, parallel_bulk, scan, streaming_bulk
 from elasticsearch_dsl.connections import connections
 from elasticsearch_dsl.field import InnerObject
+import django
 import elasticsearch_dsl as dsl
 import six
 
+import functools
+import itertools
 import logging
+import operator
 
 
 logger = logging.getLogger(__name__)
@@ -15,12 +20,69 @@ DEFAULT_ANALYZER = getattr(settings, 'SEEKER_DEFAULT_ANALYZER', 'snowball')
 
 
 def follow(obj, path, force_string=False):
-    parts = path.split('__') if path else []
-    for idx, part in enumerate(parts):
-        if hasattr(obj, 'get_%s_display' % part):
+    """
+    Follows ``path`` from ``obj``, returning the value at the end of it. The path may be a ``__``-separated string, or a
+    sequence of parts that has already been split.
+    """
+    if isinstance(path, six.string_types):
+        path = path.split('__') if path else ()
+    return _follow(obj, follow_steps(path), force_string=force_string)
+
+
+def follow_steps(parts, model=None):
+    """
+    Returns a tuple of ``(part, display_method_name)`` pairs for the parts of a ``follow`` path, so the display method
+    names don't need to be formatted for every object. If ``model`` (the class of the objects being followed) is given,
+    the display method name is ``None`` for parts that the model (or related model, further along the path) has no
+    display method for, so they aren't looked for on every object.
+    """
+    steps = []
+    for part in parts:
+        display_name = 'get_%s_display' % part
+        if model is not None and not hasattr(model, display_name):
+            display_name = None
+        steps.append((part, display_name))
+        model = related_model(model, part)
+    return tuple(steps)
+
+
+def related_model(model, name):
+    """
+    Returns the model class related to ``model`` by its field called ``name``, or ``None`` if ``model`` is ``None`` or
+    ``name`` is not a (concrete) relationship.
+    """
+    if model is None:
+        return None
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field.related_model if field.is_relation else None
+
+
+def follow_accessor(steps, model=None):
+    """
+    Returns a function that follows ``steps`` (see ``follow_steps``) from an object. Paths that are a single concrete,
+    non-relation field of ``model`` with no display method are read using ``operator.attrgetter``; anything else goes
+    through the same logic as ``follow`` (which returns ``None`` for a missing related object).
+    """
+    if model is not None and len(steps) == 1 and steps[0][1] is None:
+        try:
+            field = model._meta.get_field(steps[0][0])
+        except FieldDoesNotExist:
+            field = None
+        if field is not None and field.concrete and not field.is_relation:
+            return operator.attrgetter(steps[0][0])
+    return functools.partial(_follow, steps=steps)
+
+
+def _follow(obj, steps, force_string=False):
+    for idx, (part, display_name) in enumerate(steps):
+        display = getattr(obj, display_name, None) if display_name is not None else None
+        if display is not None:
             # If the root object has a method to get the display value for this part, we're done (the rest of the path,
             # if any, is ignored).
-            return getattr(obj, 'get_%s_display' % part)()
+            return display()
         else:
             # Otherwise, follow the yellow brick road.
             obj = getattr(obj, part, None)
@@ -28,40 +90,148 @@ def follow(obj, path, force_string=False):
                 # Managers are a special case - basically, branch and recurse over all objects with the remainder of the
                 # path. This means any path with a Manager/ManyToManyField in it will always return a list, which I
                 # think makes sense.
-                new_path = '__'.join(parts[idx + 1:])
-                if new_path:
-                    return [follow(o, new_path, force_string=True) for o in obj.all()]
+                rest = steps[idx + 1:]
+                if rest:
+                    return [_follow(o, rest, force_string=True) for o in obj.all()]
     if force_string and isinstance(obj, models.Model):
         return six.text_type(obj)
     return obj
 
 
-def serialize_object(obj, mapping, prepare=None):
+def serialization_plan(mapping, prepare=None, model=None):
     """
-    Given a Django model instance and a ``elasticsearch_dsl.Mapping`` or ``elasticsearch_dsl.InnerObject``, returns a
-    dictionary of field data that should be indexed.
+    Returns a tuple of ``(name, steps, nested, prep_func, accessor, plain)`` entries for the fields of an
+    ``elasticsearch_dsl.Mapping`` or ``elasticsearch_dsl.InnerObject``, where ``steps`` is the field name split into a
+    path to follow (see ``follow_steps``), ``nested`` is the plan for an ``InnerObject`` field's properties (or ``None``
+    for other fields), ``prep_func`` is the ``prepare_<name>`` method of ``prepare``, if it has one, ``accessor`` is a
+    function that follows ``steps`` from an object (see ``follow_accessor``), and ``plain`` is ``True`` if the field is
+    known to be a plain (non-relation) model field, whose values never need converting. If given, ``model`` is the
+    class of the objects that will be serialized. Building this once per mapping saves re-computing it for every object
+    serialized.
     """
-    data = {}
+    plan = []
     for name in mapping:
+        field = mapping[name]
+        parts = name.split('__')
+        nested = None
+        if isinstance(field, InnerObject):
+            target = model
+            for part in parts:
+                target = related_model(target, part)
+            nested = serialization_plan(field.properties, model=target)
         prep_func = getattr(prepare, 'prepare_%s' % name, None)
-        if prep_func:
+        steps = follow_steps(parts, model=model)
+        accessor = follow_accessor(steps, model=model)
+        plain = isinstance(accessor, operator.attrgetter) and related_model(model, name) is None
+        plan.append((name, steps, nested, prep_func, accessor, plain))
+    return tuple(plan)
+
+
+def related_lookups(model_class, plan, prefix='', joinable=True):
+    """
+    Returns a ``(select_related, prefetch_related)`` pair of lookup lists for the relationships of ``model_class`` that
+    would be traversed when serializing objects with ``plan``. Chains of foreign keys and one-to-one fields followed
+    from the objects themselves are fetched in the same query (using ``select_related``), while anything else, such as
+    many-to-many or reverse relationships, is prefetched for a batch of objects at once, instead of being queried
+    separately for each object. Fields with a ``prepare_<name>`` method are skipped, since there's no telling what they
+    access.
+    """
+    select = []
+    prefetch = []
+    for name, steps, nested, prep_func, accessor, plain in plan:
+        if prep_func is not None:
+            continue
+        model = model_class
+        path = []
+        joined = joinable
+        for part, display_name in steps:
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation:
+                break
+            path.append(part)
+            lookup = prefix + '__'.join(path)
+            # Once a path goes through a multi-valued (or generic) relationship, the rest of it must be prefetched.
+            joined = joined and field.concrete and not field.many_to_many
+            lookups = select if joined else prefetch
+            if lookup not in lookups:
+                lookups.append(lookup)
+            model = field.related_model
+            if model is None:
+                # Generic foreign keys can be prefetched, but not followed any further.
+                break
+        else:
+            if nested is not None and model is not None:
+                nested_prefix = prefix + '__'.join(path) + '__'
+                nested_select, nested_prefetch = related_lookups(model, nested, prefix=nested_prefix, joinable=joined)
+                select.extend(l for l in nested_select if l not in select)
+                prefetch.extend(l for l in nested_prefetch if l not in prefetch)
+    return select, prefetch
+
+
+def serialize_plan(obj, plan):
+    """
+    Returns a dictionary of field data for ``obj``, using a plan returned by ``serialization_plan``.
+    """
+    data = {}
+    for name, steps, nested, prep_func, accessor, plain in plan:
+        if prep_func is not None:
             data[name] = prep_func(obj)
+        elif plain:
+            value = accessor(obj)
+            if value is not None:
+                data[name] = value
         else:
-            field = mapping[name]
-            value = follow(obj, name)
+            value = accessor(obj)
             if value is not None:
                 if isinstance(value, models.Model):
-                    data[name] = serialize_object(value, field.properties) if isinstance(field, InnerObject) else six.text_type(value)
+                    data[name] = serialize_plan(value, nested) if nested is not None else six.text_type(value)
                 elif isinstance(value, models.Manager):
-                    if isinstance(field, InnerObject):
-                        data[name] = [serialize_object(v, field.properties) for v in value.all()]
+                    if nested is not None:
+                        data[name] = [serialize_plan(v, nested) for v in value.all()]
                     else:
-                        data[name] = [six.text_type(v) for v in value.all()]
+                        data[name] = list(map(six.text_type, value.all()))
                 else:
                     data[name] = value
     return data
 
 
+def serialize_object(obj, mapping, prepare=None):
+    """
+    Given a Django model instance and a ``elasticsearch_dsl.Mapping`` or ``elasticsearch_dsl.InnerObject``, returns a
+    dictionary of field data that should be indexed.
+    """
+    return serialize_plan(obj, serialization_plan(mapping, prepare=prepare))
+
+
+BULK_METADATA = ('_index', '_parent', '_percolate', '_routing', '_timestamp', '_ttl', '_type', '_version',
+                 '_version_type', '_id', '_retry_on_conflict')
+"""
+The document keys that are sent as bulk action metadata, rather than as part of the document source.
+"""
+
+
+def expand_document(doc, index=None, doc_type=None):
+    """
+    An ``expand_action_callback`` for the ``elasticsearch.helpers`` bulk functions, that splits a document into its
+    bulk action metadata (defaulting to ``index`` and ``doc_type``) and source. Like the default ``expand_action``,
+    the document itself is left untouched, and pre-serialized (string) documents are passed through as the source.
+    """
+    action = {'_index': index, '_type': doc_type}
+    if isinstance(doc, six.string_types):
+        return {'index': action}, doc
+    doc = doc.copy()
+    op_type = doc.pop('_op_type', 'index')
+    for key in BULK_METADATA:
+        if key in doc:
+            action[key] = doc.pop(key)
+    if op_type == 'delete':
+        return {op_type: action}, None
+    return {op_type: action}, doc.get('_source', doc)
+
+
 class Indexable (dsl.DocType):
     """
     An ``elasticsearch_dsl.DocType`` subclass with methods for getting a list (and count) of documents that should be
@@ -75,7 +245,8 @@ class Indexable (dsl.DocType):
     def documents(cls, **kwargs):
         """
         Returns (or yields) a list of documents, which are dictionaries of field data. The documents may include
-        Elasticsearch metadata, such as ``_id`` or ``_parent``.
+        Elasticsearch metadata, such as ``_id`` or ``_parent``. For large data sets, documents should be yielded as
+        they are generated (fetching at most ``chunk_size`` records at a time) rather than built up in a list.
         """
         return []
 
@@ -86,28 +257,77 @@ class Indexable (dsl.DocType):
         """
         try:
             return len(cls.documents())
-        except:
+        except TypeError:
             return None
 
     @classmethod
-    def clear(cls, index=None, using=None):
+    def bulk_index(cls, index=None, using=None, documents=None, thread_count=1, chunk_size=None,
+                   max_chunk_bytes=10 * 1024 * 1024):
         """
-        Deletes the Elasticsearch mapping associated with this document type.
+        Indexes ``documents`` (everything returned by ``cls.documents()`` by default) using Elasticsearch's bulk API, in
+        requests of at most ``chunk_size`` documents (``SEEKER_BATCH_SIZE`` by default) or ``max_chunk_bytes`` bytes.
+        With a ``thread_count`` above 1, requests are sent from a pool of threads while documents are being generated.
+        Documents that fail to index are logged, rather than raising an exception. The index is not refreshed.
+
+        Returns a ``(succeeded, failed)`` tuple of document counts.
+        """
+        using = using or cls._doc_type.using or 'default'
+        index = index or cls._doc_type.index or getattr(settings, 'SEEKER_INDEX', 'seeker')
+        es = connections.get_connection(using)
+        if documents is None:
+            documents = cls.documents()
+        bulk_options = {
+            'chunk_size': chunk_size or getattr(settings, 'SEEKER_BATCH_SIZE', 1000),
+            'max_chunk_bytes': max_chunk_bytes,
+            'raise_on_error': False,
+            'request_timeout': 120,
+            'expand_action_callback': functools.partial(expand_document, index=index, doc_type=cls._doc_type.name),
+        }
+        if thread_count > 1:
+            # Overlap building documents with sending bulk requests.
+            results = parallel_bulk(es, documents, thread_count=thread_count, **bulk_options)
+        else:
+            results = streaming_bulk(es, documents, **bulk_options)
+        succeeded = failed = 0
+        for ok, info in results:
+            if ok:
+                succeeded += 1
+            else:
+                failed += 1
+                logger.warning('Error indexing %s document: %s', cls.__name__, info)
+        return succeeded, failed
+
+    @classmethod
+    def clear(cls, index=None, using=None, refresh=True, thread_count=1):
+        """
+        Deletes the Elasticsearch mapping associated with this document type. Pass ``refresh=False`` to skip refreshing
+        the index afterwards, if the caller will refresh it anyway. With a ``thread_count`` above 1, delete requests
+        are sent from a pool of threads.
         """
         using = using or cls._doc_type.using or 'default'
         index = index or cls._doc_type.index or getattr(settings, 'SEEKER_INDEX', 'seeker')
         es = connections.get_connection(using)
         if es.indices.exists_type(index=index, doc_type=cls._doc_type.name):
+            # Only the IDs are needed, so don't fetch each document's source.
+            query = {'query': {'match_all': {}}, '_source': False}
+            size = getattr(settings, 'SEEKER_BATCH_SIZE', 1000)
+
             def get_actions():
-                for hit in scan(es, index=index, doc_type=cls._doc_type.name, query={'query': {'match_all': {}}}):
+                for hit in scan(es, index=index, doc_type=cls._doc_type.name, query=query, size=size):
                     yield {
                         '_op_type': 'delete',
                         '_index': index,
                         '_type': cls._doc_type.name,
                         '_id': hit['_id'],
                     }
-            bulk(es, get_actions())
-            es.indices.refresh(index=index)
+            if thread_count > 1:
+                # parallel_bulk is lazy, so consume its results (raising on the first error, like bulk).
+                for ok, info in parallel_bulk(es, get_actions(), thread_count=thread_count):
+                    pass
+            else:
+                bulk(es, get_actions())
+            if refresh:
+                es.indices.refresh(index=index)
 
 
 class ModelIndex (Indexable):
@@ -115,6 +335,11 @@ class ModelIndex (Indexable):
     A subclass of ``Indexable`` that returns document data based on Django models.
     """
 
+    keyset_field = 'pk'
+    """
+    A unique, non-null, orderable model field used to page through ``queryset()`` when indexing.
+    """
+
     @classmethod
     def queryset(cls):
         """
@@ -123,6 +348,47 @@ class ModelIndex (Indexable):
         """
         raise NotImplementedError('%s must implement a queryset classmethod.' % cls.__name__)
 
+    @classmethod
+    def source_fields(cls):
+        """
+        May be overridden to return a list of model field names needed to build documents, in which case only those
+        columns are fetched (using ``QuerySet.only``) when indexing. Returns ``None`` by default, fetching all fields.
+        Any other field is loaded with a separate query per object if it is accessed, including by the model's
+        ``__init__``, ``__str__``, or ``post_init`` signal handlers. See ``mapped_fields``.
+        """
+        return None
+
+    @classmethod
+    def mapped_fields(cls):
+        """
+        Returns the model fields the mapping uses, if documents are built entirely from the mapping (with no
+        ``prepare_<name>`` methods, or overridden ``serialize``, ``get_id``, or ``prepare_batch``), for use as
+        ``source_fields``. Returns ``None`` otherwise, or if ``queryset()`` already uses ``select_related()`` (without
+        naming fields), ``only``, or ``defer``.
+        """
+        if not cls.default_serialization():
+            return None
+        qs = cls.queryset()
+        if qs.query.select_related is True or qs.query.deferred_loading[0]:
+            return None
+        model = qs.model
+        fields = []
+        for name, steps, nested, prep_func, accessor, plain in cls.serialization_plan():
+            if prep_func is not None:
+                return None
+            try:
+                field = model._meta.get_field(steps[0][0])
+            except FieldDoesNotExist:
+                # Probably a property or method, which could use any field.
+                return None
+            if field.concrete:
+                if not field.many_to_many and field.name not in fields:
+                    fields.append(field.name)
+            elif not (field.many_to_many or field.one_to_many or field.one_to_one):
+                # Generic foreign keys are not concrete, but still need their underlying columns.
+                return None
+        return fields
+
     @classmethod
     def count(cls):
         """
@@ -133,27 +399,87 @@ class ModelIndex (Indexable):
     @classmethod
     def documents(cls, **kwargs):
         """
-        Yields document data generated from ``cls.queryset()``. Multiple queries are made, fetching
-        ``SEEKER_BATCH_SIZE`` instances at a time, to avoid memory problems with very large querysets.
+        Yields document data generated from ``cls.queryset()``. Multiple queries are made, fetching ``chunk_size``
+        instances at a time (ordered by, and filtered on, ``keyset_field``), to avoid memory problems with very large
+        querysets. Each batch of instances is passed to ``cls.prepare_batch`` before being serialized.
 
-        :param cursor: If ``True``, a special ``CustorQuery`` will be used to yield Django objects from a server-side
-                       cursor.
+        :param cursor: If ``True``, Django objects will be yielded from a server-side cursor (on PostgreSQL), using
+                       ``QuerySet.iterator`` on Django 1.11 and later, or a special ``CursorQuery`` before that.
+        :param chunk_size: The number of instances to fetch at a time. Defaults to ``SEEKER_BATCH_SIZE``.
         """
+        batch_size = kwargs.get('chunk_size') or getattr(settings, 'SEEKER_BATCH_SIZE', 1000)
+        serialize = cls.serialize
+        qs = cls.queryset()
+        columns = None if kwargs.get('cursor', False) else cls.values_fields()
+        select = [] if columns is not None else cls.select_related_lookups()
+        if select and qs.query.select_related is not True:
+            # Adds to any select_related lookups of the queryset itself. Without any lookups, select_related() would
+            # follow every non-null foreign key instead.
+            qs = qs.select_related(*select)
+        fields = cls.source_fields()
+        if fields and columns is None:
+            # Relationships fetched using select_related (by the mapping or the queryset itself) can't be deferred.
+            joined = qs.query.select_related if isinstance(qs.query.select_related, dict) else {}
+            qs = qs.only(cls.keyset_field, *set(fields).union(joined))
         if kwargs.get('cursor', False):
-            from .compiler import CursorQuery
-            qs = cls.queryset().order_by()
-            # Swap out the Query object with a clone using our subclass.
-            qs.query = qs.query.clone(klass=CursorQuery)
-            for obj in qs.iterator():
-                yield cls.serialize(obj)
+            # QuerySet.iterator doesn't prefetch, but joined relationships still work.
+            qs = qs.order_by()
+            if django.VERSION >= (2, 0):
+                objects = qs.iterator(chunk_size=batch_size)
+            elif django.VERSION >= (1, 11):
+                objects = qs.iterator()
+            else:
+                from .compiler import CursorQuery
+                # Swap out the Query object with a clone using our subclass.
+                qs.query = qs.query.clone(klass=CursorQuery, fetch_size=batch_size)
+                objects = qs.iterator()
+            while True:
+                batch = list(itertools.islice(objects, batch_size))
+                if not batch:
+                    break
+                cls.prepare_batch(batch)
+                for obj in batch:
+                    yield serialize(obj)
         else:
-            qs = cls.queryset().order_by('pk')
-            total = qs.count()
-            batch_size = getattr(settings, 'SEEKER_BATCH_SIZE', 1000)
-            for start in range(0, total, batch_size):
-                end = min(start + batch_size, total)
-                for obj in qs.all()[start:end]:
-                    yield cls.serialize(obj)
+            # Keyset pagination - each batch picks up where the last one left off, instead of using an (increasingly
+            # expensive) OFFSET. Related objects are joined or prefetched for each batch, rather than queried for each
+            # object.
+            qs = qs.order_by(cls.keyset_field)
+            if columns is not None:
+                # Every mapped field is a plain column, so skip building model instances and read the values directly.
+                qs = qs.values(*set(('pk', cls.keyset_field) + columns))
+
+                def serialize(row):
+                    data = {'_id': str(row['pk'])}
+                    for name in columns:
+                        value = row[name]
+                        if value is not None:
+                            data[name] = value
+                    return data
+                get_last = operator.itemgetter(cls.keyset_field)
+            else:
+                qs = qs.prefetch_related(*cls.prefetch_lookups())
+                get_last = operator.attrgetter(cls.keyset_field)
+            last = None
+            while True:
+                page = qs if last is None else qs.filter(**{'%s__gt' % cls.keyset_field: last})
+                batch = list(page[:batch_size])
+                if not batch:
+                    break
+                if columns is None:
+                    cls.prepare_batch(batch)
+                for obj in batch:
+                    yield serialize(obj)
+                last = get_last(batch[-1])
+
+    @classmethod
+    def prepare_batch(cls, objects):
+        """
+        Called by ``documents`` with each batch (list) of model instances before they are serialized. May be overridden
+        to fetch data for the whole batch at once (aggregates, for instance) and attach it to the instances, for use by
+        ``prepare_<name>`` methods, instead of querying it separately for each instance.
+        """
+        pass
 
     @classmethod
     def get_id(cls, obj):
@@ -166,12 +492,69 @@ class ModelIndex (Indexable):
     def serialize(cls, obj):
         """
         Returns a dictionary of field data for the specified model instance. Also includes an ``_id`` which is returned
-        from ``cls.get_id(obj)``. Uses ``seeker.mapping.serialize_object`` to build the field data dictionary.
+        from ``cls.get_id(obj)``. Uses ``seeker.mapping.serialize_plan`` (with the cached ``serialization_plan``) to
+        build the field data dictionary.
         """
         data = {'_id': cls.get_id(obj)}
-        data.update(serialize_object(obj, cls._doc_type.mapping, prepare=cls))
+        data.update(serialize_plan(obj, cls.serialization_plan()))
         return data
 
+    @classmethod
+    def select_related_lookups(cls):
+        """
+        Returns a list of ``select_related`` lookups applied to ``cls.queryset()`` when indexing. By default, these are
+        the foreign keys (and one-to-one fields) traversed by the mapping (see ``seeker.mapping.related_lookups``).
+        """
+        return related_lookups(cls.queryset().model, cls.serialization_plan())[0]
+
+    @classmethod
+    def prefetch_lookups(cls):
+        """
+        Returns a list of ``prefetch_related`` lookups applied to ``cls.queryset()`` when indexing. By default, these
+        are the many-to-many and reverse relationships traversed by the mapping (see
+        ``seeker.mapping.related_lookups``). Lookups already prefetched by ``queryset()`` are not fetched twice.
+        """
+        return related_lookups(cls.queryset().model, cls.serialization_plan())[1]
+
+    @classmethod
+    def default_serialization(cls):
+        """
+        Returns ``True`` if documents are built using the default ``serialize``, ``get_id``, and ``prepare_batch``
+        methods, i.e. solely from the mapping (and any ``prepare_<name>`` methods).
+        """
+        return (cls.serialize.__func__ is ModelIndex.serialize.__func__ and
+                cls.get_id.__func__ is ModelIndex.get_id.__func__ and
+                cls.prepare_batch.__func__ is ModelIndex.prepare_batch.__func__)
+
+    @classmethod
+    def values_fields(cls):
+        """
+        Returns a tuple of the model columns to fetch (using ``QuerySet.values``) instead of model instances when
+        indexing, or ``None`` if documents need to be built from model instances. Values are only used when
+        ``serialize``, ``get_id``, and ``prepare_batch`` are not overridden, and every mapped field is a plain
+        (non-relation) model field with no ``prepare_<name>`` or display method.
+        """
+        if not cls.default_serialization():
+            return None
+        columns = []
+        for name, steps, nested, prep_func, accessor, plain in cls.serialization_plan():
+            if prep_func is not None or not plain:
+                return None
+            columns.append(name)
+        return tuple(columns)
+
+    @classmethod
+    def serialization_plan(cls):
+        """
+        Returns the ``seeker.mapping.serialization_plan`` for this document's mapping (and ``prepare_<name>`` methods),
+        which is built the first time it is needed and cached on the class.
+        """
+        plan = cls.__dict__.get('_serialization_plan')
+        if plan is None:
+            plan = serialization_plan(cls._doc_type.mapping, prepare=cls, model=cls.queryset().model)
+            cls._serialization_plan = plan
+        return plan
+
     @classmethod
     def connect_additional_signal_handlers(cls, indexer):
         """
@@ -208,6 +591,26 @@ The same as ``RawString``, but with ``multi=True`` specified, so lists are retur
 """
 
 
+DEFAULT_TYPE_MAP = {
+    models.DateField: dsl.Date(),
+    models.DateTimeField: dsl.Date(),
+    models.IntegerField: dsl.Long(),
+    models.PositiveIntegerField: dsl.Long(),
+    models.BooleanField: dsl.Boolean(),
+    models.SlugField: dsl.String(index='not_analyzed'),
+    models.DecimalField: dsl.Double(),
+    models.FloatField: dsl.Float(),
+}
+"""
+The ``elasticsearch_dsl.Field`` instances used by ``document_field`` for Django field classes, built once and shared
+(like ``RawString``) by every mapping. Fields of any other class are mapped as ``RawString``.
+"""
+
+if hasattr(models, 'NullBooleanField'):
+    # NullBooleanField was removed in Django 4.0 (in favor of BooleanField(null=True)).
+    DEFAULT_TYPE_MAP[models.NullBooleanField] = DEFAULT_TYPE_MAP[models.BooleanField]
+
+
 def document_field(field):
     """
     The default ``field_factory`` method for converting Django field instances to ``elasticsearch_dsl.Field`` instances.
@@ -217,18 +620,7 @@ def document_field(field):
         return None
     if field.many_to_many:
         return RawMultiString
-    defaults = {
-        models.DateField: dsl.Date(),
-        models.DateTimeField: dsl.Date(),
-        models.IntegerField: dsl.Long(),
-        models.PositiveIntegerField: dsl.Long(),
-        models.BooleanField: dsl.Boolean(),
-        models.NullBooleanField: dsl.Boolean(),
-        models.SlugField: dsl.String(index='not_analyzed'),
-        models.DecimalField: dsl.Double(),
-        models.FloatField: dsl.Float(),
-    }
-    return defaults.get(field.__class__, RawString)
+    return DEFAULT_TYPE_MAP.get(field.__class__, RawString)
 
 
 def deep_field_factory(field):
@@ -262,6 +654,8 @@ def build_mapping(model_class, mapping=None, doc_type=None, fields=None, exclude
         mapping = dsl.Mapping(doc_type)
     if field_factory is None:
         field_factory = document_field
+    fields = set(fields) if fields else None
+    exclude = set(exclude) if exclude else None
     for f in model_class._meta.get_fields():
         if fields and f.name not in fields:
             continue
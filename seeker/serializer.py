@@ -0,0 +1,34 @@
+from elasticsearch_dsl.serializer import AttrJSONSerializer
+import six
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONSerializer (AttrJSONSerializer):
+    """
+    A drop-in replacement for the ``elasticsearch_dsl`` JSON serializer that uses `orjson`_ (when it is installed) to
+    encode request bodies. Anything orjson can't encode natively is passed through ``AttrJSONSerializer.default``, and
+    the standard ``json`` module is used as a fallback. Responses are decoded by ``JSONSerializer``, since orjson would
+    turn integers that don't fit in 64 bits into floats.
+
+    To use it, pass it when configuring connections::
+
+        connections.configure(default={'hosts': 'localhost', 'serializer': FastJSONSerializer()})
+
+    .. _orjson: https://github.com/ijl/orjson
+    """
+
+    def dumps(self, data):
+        # Don't serialize strings (same as JSONSerializer).
+        if orjson is None or isinstance(data, six.string_types):
+            return super(FastJSONSerializer, self).dumps(data)
+        try:
+            return orjson.dumps(data, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            # Things like integers that don't fit in 64 bits.
+            return super(FastJSONSerializer, self).dumps(data)
+
@@ -97,7 +97,7 @@ def seeker_highlight(text, query, algorithm='english'):
         stemmer = snowballstemmer.stemmer(algorithm)
         stemWord = stemmer.stemWord
         stemWords = stemmer.stemWords
-    except:
+    except (ImportError, KeyError, AttributeError):
         stemWord = lambda word: word
         stemWords = lambda words: words
     phrases = _phrase_re.findall(query)
@@ -1,11 +1,14 @@
+from django import db
 from django.conf import settings
 from django.utils.encoding import force_text
 from elasticsearch import NotFoundError
+from elasticsearch.helpers import bulk
 from elasticsearch_dsl.connections import connections
 import elasticsearch_dsl as dsl
 
 from .registry import model_documents
 
+import contextlib
 import importlib
 import sys
 import time
@@ -17,12 +20,12 @@ def import_class(fq_name):
     return getattr(mod, class_name)
 
 
-def index(obj, index=None, using=None):
+def index(obj, index=None, using=None, refresh=False):
     """
-    Shortcut to index a Django object based on it's model class.
+    Shortcut to index a Django object based on it's model class. Pass ``refresh=True`` to refresh the index afterwards,
+    making the change visible to searches immediately (instead of after the index's next periodic refresh).
     """
-    from django.contrib.contenttypes.models import ContentType
-    model_class = ContentType.objects.get_for_model(obj).model_class()
+    model_class = obj._meta.concrete_model
     for doc_class in model_documents.get(model_class, []):
         if not doc_class.queryset().filter(pk=obj.pk).exists():
             continue
@@ -36,16 +39,99 @@ def index(obj, index=None, using=None):
             doc_type=doc_class._doc_type.name,
             body=body,
             id=doc_id,
-            refresh=True
+            refresh=refresh
         )
 
 
-def delete(obj, index=None, using=None):
+def bulk_index(objects, index=None, using=None, refresh=False):
     """
-    Shortcut to delete a Django object from the ES index based on it's model class.
+    Shortcut to index a list of Django objects (all of the same model class) using Elasticsearch's bulk API, instead of
+    calling ``index`` for every object. Pass ``refresh=True`` to refresh each affected index once at the end.
     """
-    from django.contrib.contenttypes.models import ContentType
-    model_class = ContentType.objects.get_for_model(obj).model_class()
+    objects = list(objects)
+    if not objects:
+        return
+    model_class = objects[0]._meta.concrete_model
+    batch_size = getattr(settings, 'SEEKER_BATCH_SIZE', 1000)
+    refresh_indices = {}
+    for doc_class in model_documents.get(model_class, []):
+        doc_using = using or doc_class._doc_type.using or 'default'
+        doc_index = index or doc_class._doc_type.index or getattr(settings, 'SEEKER_INDEX', 'seeker')
+        doc_type = doc_class._doc_type.name
+
+        def get_actions():
+            for start in range(0, len(objects), batch_size):
+                batch = objects[start:start + batch_size]
+                # Check which objects are in the document's queryset with a single query per batch.
+                pks = set(doc_class.queryset().filter(pk__in=[obj.pk for obj in batch]).values_list('pk', flat=True))
+                for obj in batch:
+                    if obj.pk in pks:
+                        data = doc_class.serialize(obj)
+                        data['_index'] = doc_index
+                        data['_type'] = doc_type
+                        yield data
+
+        bulk(connections.get_connection(doc_using), get_actions(), chunk_size=batch_size)
+        refresh_indices.setdefault(doc_using, set()).add(doc_index)
+    if refresh:
+        for doc_using, indices in refresh_indices.items():
+            connections.get_connection(doc_using).indices.refresh(index=','.join(sorted(indices)))
+
+
+def disable_refresh(es, index, replicas=False):
+    """
+    Turns off periodic refreshes for the specified index, for faster bulk indexing. With ``replicas=True``, replicas are
+    also turned off, which leaves the index without redundancy until the (full) replica recovery after indexing, so
+    it's best kept for indices that aren't live yet. Returns the original settings, to be passed to ``restore_refresh``
+    once indexing is finished.
+    """
+    original = {'refresh_interval': '1s'}
+    if replicas:
+        original['number_of_replicas'] = 1
+    for data in es.indices.get_settings(index=index).values():
+        index_settings = data['settings']['index']
+        for key in original:
+            original[key] = index_settings.get(key, original[key])
+    changes = {'refresh_interval': '-1'}
+    if replicas:
+        changes['number_of_replicas'] = 0
+    es.indices.put_settings(index=index, body={'index': changes})
+    return original
+
+
+def restore_refresh(es, index, original):
+    """
+    Restores the index settings returned by ``disable_refresh``.
+    """
+    es.indices.put_settings(index=index, body={'index': original})
+
+
+@contextlib.contextmanager
+def refresh_disabled(index=None, using=None, refresh=True):
+    """
+    Context manager that turns off periodic refreshes for an index while loading data into it, then restores the
+    original refresh interval and refreshes the index (unless ``refresh=False``) on exit::
+
+        with refresh_disabled():
+            bulk_index(Book.objects.all())
+    """
+    es = connections.get_connection(using or 'default')
+    index = index or getattr(settings, 'SEEKER_INDEX', 'seeker')
+    original = disable_refresh(es, index)
+    try:
+        yield
+    finally:
+        restore_refresh(es, index, original)
+    if refresh:
+        es.indices.refresh(index=index)
+
+
+def delete(obj, index=None, using=None, refresh=False):
+    """
+    Shortcut to delete a Django object from the ES index based on it's model class. Pass ``refresh=True`` to refresh
+    the index afterwards.
+    """
+    model_class = obj._meta.concrete_model
     for doc_class in model_documents.get(model_class, []):
         doc_using = using or doc_class._doc_type.using or 'default'
         doc_index = index or doc_class._doc_type.index or getattr(settings, 'SEEKER_INDEX', 'seeker')
@@ -55,7 +141,7 @@ def delete(obj, index=None, using=None):
                 index=doc_index,
                 doc_type=doc_class._doc_type.name,
                 id=doc_class.get_id(obj),
-                refresh=True
+                refresh=refresh
             )
         except NotFoundError:
             # If this object wasn't indexed for some reason (maybe not in the document's queryset), no big deal.
@@ -77,18 +163,42 @@ def search(models=None, using='default'):
     return dsl.Search(using=using).index(*indices).doc_type(*types)
 
 
-def progress(iterator, count=None, label='', size=40, chars='# ', output=sys.stdout, frequency=1.0):
+def approximate_count(model_class):
+    """
+    Returns the approximate number of rows in the database table for ``model_class``, taken from the database's table
+    statistics instead of a (potentially slow) ``COUNT(*)`` query. Only PostgreSQL and MySQL are supported; ``None`` is
+    returned for other databases, or if no statistics are available.
+    """
+    connection = db.connections[db.router.db_for_read(model_class)]
+    table = model_class._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def progress(iterator, count=None, label='', size=40, chars='# ', output=sys.stdout, frequency=1.0, miniters=1):
     """
-    An iterator wrapper that writes/updates a progress bar to an output stream (stdout by default).
+    An iterator wrapper that writes/updates a progress bar to an output stream (stdout by default). The elapsed time is
+    only checked every ``miniters`` items, so large values keep the per-item overhead low for long-running iterators.
     Based on http://code.activestate.com/recipes/576986-progress-bar-for-console-programs-as-iterator/
     """
     assert len(chars) >= 2
+    assert miniters >= 1
     if label:
         label = force_text(label) + ' '
 
     try:
         count = len(iterator)
-    except:
+    except TypeError:
         pass
 
     start = time.time()
@@ -113,13 +223,15 @@ def progress(iterator, count=None, label='', size=40, chars='# ', output=sys.std
     show(0)
     last_update = 0.0
     processed = 0
+    next_check = miniters
     for item in iterator:
         yield item
         processed += 1
-        since = time.time() - last_update
-        if since >= frequency:
-            show(processed)
-            last_update = time.time()
+        if processed >= next_check:
+            next_check = processed + miniters
+            if time.time() - last_update >= frequency:
+                show(processed)
+                last_update = time.time()
     show(processed)
 
     output.write('\n')
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.contrib import messages
+from django.core.exceptions import FieldDoesNotExist
 from django.http import Http404, JsonResponse, QueryDict, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.template import Context, RequestContext, loader, TemplateDoesNotExist
@@ -85,15 +86,16 @@ class Column (object):
         value = getattr(result, self.field, None)
         if self.value_format:
             value = self.value_format(value)
-        try:
+        # Check for highlights up front, rather than raising (and catching) an exception for every column of every
+        # result that has none.
+        highlight = []
+        if self.highlight and 'highlight' in result.meta:
             if '*' in self.highlight:
                 # If highlighting was requested for multiple fields, grab any matching fields as a dictionary.
                 r = self.highlight.replace('*', r'\w+').replace('.', r'\.')
                 highlight = {f.replace('.', '_'): result.meta.highlight[f] for f in result.meta.highlight if re.match(r, f)}
-            else:
+            elif self.highlight in result.meta.highlight:
                 highlight = result.meta.highlight[self.highlight]
-        except:
-            highlight = []
         params = {
             'result': result,
             'field': self.field,
@@ -338,7 +340,7 @@ class SeekerView (View):
             # If the document is a ModelIndex, try to get the verbose_name of the Django field.
             f = self.document.queryset().model._meta.get_field(field_name)
             return f.verbose_name[0].upper() + f.verbose_name[1:]
-        except:
+        except (AttributeError, NotImplementedError, FieldDoesNotExist):
             # Otherwise, just make the field name more human-readable.
             return field_name.replace('_', ' ').capitalize()
 
@@ -1,11 +1,29 @@
-from django.core.management import call_command
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from elasticsearch_dsl.connections import connections
+from elasticsearch_dsl.serializer import AttrJSONSerializer
+from elasticsearch_dsl.utils import AttrList
 
 import seeker
+from seeker.mapping import expand_document, follow_accessor, follow_steps, serialize_object
+from seeker.serializer import FastJSONSerializer
 
 from .external import BaseDocument
-from .mappings import BookDocument, DerivedDocument, DjangoBookDocument
-from .models import Book, Category
+from .mappings import BookDocument, DerivedDocument, DjangoBookDocument, MagazineDocument
+from .models import Book, Category, Magazine
+
+import datetime
+import decimal
+import json
+import six
+import uuid
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 
 
 class QueryTests (TestCase):
@@ -54,6 +72,136 @@ class QueryTests (TestCase):
         django_books = set(r.meta.id for r in DjangoBookDocument.search().execute())
         self.assertTrue(django_books.issubset(all_books))
 
+    def test_documents(self):
+        # Fetching one object per batch should still yield every book, in primary key order.
+        ids = [int(doc['_id']) for doc in BookDocument.documents(chunk_size=1)]
+        self.assertEqual(ids, sorted(Book.objects.values_list('pk', flat=True)))
+
+    def test_serialize(self):
+        book = Book.objects.first()
+        data = serialize_object(book, BookDocument._doc_type.mapping)
+        data['_id'] = str(book.pk)
+        self.assertEqual(BookDocument.serialize(book), data)
+        # The serialization plan is only built once per document class.
+        self.assertIs(BookDocument.serialization_plan(), BookDocument.serialization_plan())
+
+    def test_prefetch(self):
+        self.assertEqual(BookDocument.select_related_lookups(), ['category'])
+        self.assertEqual(BookDocument.prefetch_lookups(), ['authors'])
+        # One query for the books (and their categories), one for their authors, and one for the (empty) next batch.
+        with self.assertNumQueries(3):
+            list(BookDocument.documents())
+
+    def test_cursor(self):
+        docs = sorted(BookDocument.documents(cursor=True), key=lambda doc: int(doc['_id']))
+        self.assertEqual(docs, list(BookDocument.documents()))
+
+    def test_prepare_batch(self):
+        class BatchDocument (BookDocument):
+            @classmethod
+            def prepare_batch(cls, objects):
+                for obj in objects:
+                    obj.batch_size = len(objects)
+
+            @classmethod
+            def prepare_pages(cls, obj):
+                return obj.batch_size
+        self.assertEqual([doc['pages'] for doc in BatchDocument.documents(chunk_size=2)], [2, 2, 1])
+        self.assertEqual([doc['pages'] for doc in BatchDocument.documents(cursor=True, chunk_size=2)], [2, 2, 1])
+
+    def test_source_fields(self):
+        class TitleDocument (DjangoBookDocument):
+            @classmethod
+            def source_fields(cls):
+                return ('title',)
+        # Deferred fields are loaded on demand, so the documents should be the same.
+        self.assertEqual(list(TitleDocument.documents()), list(DjangoBookDocument.documents()))
+        # All fields are fetched by default.
+        self.assertIsNone(BookDocument.source_fields())
+        # The concrete fields used by the mapping, unless a prepare method could use any field.
+        self.assertEqual(BookDocument.mapped_fields(), ['title', 'category', 'date_published', 'pages', 'in_print'])
+
+        class PagesDocument (BookDocument):
+            @classmethod
+            def prepare_pages(cls, obj):
+                return obj.pages
+        self.assertIsNone(PagesDocument.mapped_fields())
+
+    def test_source_fields_select_related(self):
+        class JoinedDocument (seeker.ModelIndex):
+            class Meta:
+                mapping = seeker.build_mapping(Book, doc_type='joined_book', fields=('title', 'authors'))
+
+            @classmethod
+            def queryset(cls):
+                return Book.objects.select_related('category')
+
+            @classmethod
+            def source_fields(cls):
+                return cls.mapped_fields()
+        # Categories aren't mapped, but are still joined (so can't be deferred) since the queryset selects them.
+        self.assertEqual(JoinedDocument.source_fields(), ['title'])
+        with CaptureQueriesContext(connection) as context:
+            docs = list(JoinedDocument.documents())
+        self.assertIn('core_category', context.captured_queries[0]['sql'])
+        titles = list(Book.objects.order_by('pk').values_list('title', flat=True))
+        self.assertEqual([doc['title'] for doc in docs], titles)
+
+        class AllJoinedDocument (JoinedDocument):
+            @classmethod
+            def queryset(cls):
+                return Book.objects.select_related()
+        self.assertIsNone(AllJoinedDocument.source_fields())
+        self.assertEqual(list(AllJoinedDocument.documents()), docs)
+
+    def test_follow_accessor(self):
+        book = Book(title='Fluent Python')
+        self.assertEqual(follow_accessor(follow_steps(['title'], Book), Book)(book), 'Fluent Python')
+        # A required foreign key with no related object is followed to None, rather than raising an exception.
+        through = Book.authors.through
+        self.assertIsNone(follow_accessor(follow_steps(['book'], through), through)(through()))
+
+    def test_values_fields(self):
+        # Magazines only map plain columns, books also map relationships.
+        self.assertEqual(MagazineDocument.values_fields(), ('name', 'issue_date'))
+        self.assertIsNone(BookDocument.values_fields())
+        expected = [MagazineDocument.serialize(m) for m in Magazine.objects.order_by('pk')]
+        self.assertEqual(list(MagazineDocument.documents(chunk_size=1)), expected)
+
+    def test_expand_document(self):
+        doc = {'_id': '1', 'title': 'Two Scoops of Django'}
+        action, source = expand_document(doc, index='books', doc_type='book')
+        self.assertEqual(action, {'index': {'_index': 'books', '_type': 'book', '_id': '1'}})
+        self.assertEqual(source, {'title': 'Two Scoops of Django'})
+        self.assertEqual(doc, {'_id': '1', 'title': 'Two Scoops of Django'})
+        action, source = expand_document('{"title": "Fluent Python"}', index='books', doc_type='book')
+        self.assertEqual(action, {'index': {'_index': 'books', '_type': 'book'}})
+        self.assertEqual(source, '{"title": "Fluent Python"}')
+        action, source = expand_document({'_op_type': 'delete', '_id': '1', '_index': 'other'}, index='books')
+        self.assertEqual(action, {'delete': {'_index': 'other', '_type': None, '_id': '1'}})
+        self.assertIsNone(source)
+
+    def test_bulk_index(self):
+        all_books = BookDocument.search().count()
+        django_books = DjangoBookDocument.search().count()
+        new_books = [
+            Book.objects.create(title='Django Unchained'),
+            Book.objects.create(title='Two Scoops of Django'),
+            Book.objects.create(title='Fluent Python'),
+        ]
+        seeker.bulk_index(new_books, refresh=True)
+        self.assertEqual(BookDocument.search().count(), all_books + 3)
+        self.assertEqual(DjangoBookDocument.search().count(), django_books + 2)
+        for book in new_books:
+            seeker.delete(book, refresh=True)
+
+    def test_refresh_disabled(self):
+        all_books = BookDocument.search().count()
+        with seeker.refresh_disabled():
+            seeker.bulk_index([Book.objects.create(title='Refreshed Later')])
+            self.assertEqual(BookDocument.search().count(), all_books)
+        self.assertEqual(BookDocument.search().count(), all_books + 1)
+
     def test_index_delete(self):
         # Make sure new books are only indexed into the documents that include them in their querysets.
         all_books = BookDocument.search().count()
@@ -63,10 +211,142 @@ class QueryTests (TestCase):
             Book.objects.create(title='I Love Python'),
         ]
         for book in new_books:
-            seeker.index(book)
+            seeker.index(book, refresh=True)
         self.assertEqual(BookDocument.search().count(), all_books + 2)
         self.assertEqual(DjangoBookDocument.search().count(), django_books + 1)
         for book in new_books:
-            seeker.delete(book)
+            seeker.delete(book, refresh=True)
         self.assertEqual(BookDocument.search().count(), all_books)
         self.assertEqual(DjangoBookDocument.search().count(), django_books)
+
+
+class SerializerTests (TestCase):
+
+    def test_fast_json_serializer(self):
+        stock = AttrJSONSerializer()
+        fast = FastJSONSerializer()
+        data = {
+            'date': datetime.date(2017, 1, 2),
+            'datetime': datetime.datetime(2017, 1, 2, 3, 4, 5, 678000),
+            'decimal': decimal.Decimal('1.50'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'list': AttrList([1, 'two']),
+            'text': u'D\xe9j\xe0 vu',
+        }
+        self.assertEqual(json.loads(fast.dumps(data)), json.loads(stock.dumps(data)))
+        # Integers wider than 64 bits fall back to the standard json module.
+        big = {'big': 2 ** 64}
+        self.assertEqual(fast.dumps(big), stock.dumps(big))
+        self.assertEqual(json.loads(fast.dumps(big)), big)
+        # Strings are sent as-is.
+        self.assertEqual(fast.dumps('{"a": 1}'), '{"a": 1}')
+
+
+class OtherMagazineDocument (MagazineDocument):
+
+    class Meta:
+        index = 'seeker-tests-other'
+
+
+class ReindexTests (TransactionTestCase):
+    """
+    Runs the reindex command against a mocked Elasticsearch client and bulk helpers. These aren't run in a transaction,
+    so that --workers threads can read the fixtures using their own database connections.
+    """
+    fixtures = ('books',)
+
+    def setUp(self):
+        self.es = mock.MagicMock()
+        self.es.indices.get_settings.side_effect = lambda index: {index: {'settings': {'index': {
+            'number_of_shards': '2',
+            'refresh_interval': '30s',
+            'number_of_replicas': '2',
+        }}}}
+        # The number of documents sent for each index, and the bulk helper and thread count used.
+        self.indexed = {}
+        self.failures = False
+        patches = [
+            mock.patch.object(connections, 'get_connection', return_value=self.es),
+            mock.patch.object(seeker.Indexable, 'init'),
+            mock.patch('seeker.mapping.streaming_bulk', side_effect=self.fake_bulk('streaming_bulk')),
+            mock.patch('seeker.mapping.parallel_bulk', side_effect=self.fake_bulk('parallel_bulk')),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def fake_bulk(self, name):
+        def bulk(client, actions, thread_count=1, **kwargs):
+            expand = kwargs['expand_action_callback']
+            for doc in actions:
+                action, source = expand(doc)
+                index = action['index']['_index']
+                self.indexed.setdefault(index, []).append((name, thread_count, action['index']['_type']))
+                yield (not self.failures, action)
+        return bulk
+
+    def put_settings(self, index):
+        return [c[1]['body']['index'] for c in self.es.indices.put_settings.call_args_list if c[1]['index'] == index]
+
+    def test_reindex(self):
+        call_command('reindex', quiet=True, forcemerge=True)
+        types = set(doc_type for name, threads, doc_type in self.indexed['seeker-tests'])
+        self.assertEqual(types, set(['book', 'django_book', 'magazine']))
+        self.assertEqual(len(self.indexed['seeker-tests']), Book.objects.count() + 1 + Magazine.objects.count())
+        self.assertEqual(set((name, threads) for name, threads, doc_type in self.indexed['seeker-tests']),
+                         set([('streaming_bulk', 1)]))
+        # Refreshes and replicas are turned off while loading, then restored.
+        self.assertEqual(self.put_settings('seeker-tests'), [
+            {'refresh_interval': '-1', 'number_of_replicas': 0},
+            {'refresh_interval': '30s', 'number_of_replicas': '2'},
+        ])
+        self.es.indices.refresh.assert_called_once_with(index='seeker-tests')
+        self.es.indices.forcemerge.assert_called_once_with(index='seeker-tests', max_num_segments=5)
+
+    def test_reindex_bulk_threads(self):
+        # With --bulk-threads 0, requests are sent from one thread per primary shard.
+        call_command('reindex', quiet=True, bulk_threads=0)
+        self.assertEqual(set((name, threads) for name, threads, doc_type in self.indexed['seeker-tests']),
+                         set([('parallel_bulk', 2)]))
+        self.assertFalse(self.es.indices.forcemerge.called)
+
+    def test_reindex_approx_count(self):
+        with mock.patch('seeker.management.commands.reindex.approximate_count', return_value=42) as approx, \
+                mock.patch('seeker.management.commands.reindex.progress', side_effect=lambda docs, **kwargs: docs) \
+                as progress:
+            call_command('reindex', approx_count=True)
+        self.assertEqual(set(c[0][0] for c in approx.call_args_list), set([Book, Magazine]))
+        counts = dict((c[1]['label'], c[1]['count']) for c in progress.call_args_list)
+        self.assertEqual(counts, {
+            BookDocument.__name__: 42,
+            DjangoBookDocument.__name__: 42,
+            MagazineDocument.__name__: 42,
+            DerivedDocument.__name__: None,
+        })
+
+    def test_reindex_workers(self):
+        doc_classes = [BookDocument, OtherMagazineDocument]
+        with mock.patch('seeker.management.commands.reindex.documents', doc_classes):
+            call_command('reindex', quiet=True, workers=2)
+        self.assertEqual(len(self.indexed['seeker-tests']), Book.objects.count())
+        self.assertEqual(len(self.indexed['seeker-tests-other']), Magazine.objects.count())
+        for index in ('seeker-tests', 'seeker-tests-other'):
+            self.assertEqual(self.put_settings(index)[-1], {'refresh_interval': '30s', 'number_of_replicas': '2'})
+        self.es.indices.refresh.assert_called_once_with(index='seeker-tests,seeker-tests-other')
+
+    def test_reindex_failures(self):
+        self.failures = True
+        with self.assertRaises(CommandError):
+            call_command('reindex', quiet=True, stderr=six.StringIO())
+        self.assertEqual(self.put_settings('seeker-tests')[-1], {'refresh_interval': '30s', 'number_of_replicas': '2'})
+
+    def test_reindex_error(self):
+        # Index settings are restored even if indexing fails outright.
+        with mock.patch('seeker.mapping.streaming_bulk', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                call_command('reindex', quiet=True)
+        self.assertEqual(self.put_settings('seeker-tests'), [
+            {'refresh_interval': '-1', 'number_of_replicas': 0},
+            {'refresh_interval': '30s', 'number_of_replicas': '2'},
+        ])
+        self.assertFalse(self.es.indices.refresh.called)